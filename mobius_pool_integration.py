@@ -1,39 +1,144 @@
 from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
-from decimal import Decimal, getcontext
-import math
-
-# Set precision for decimal calculations
-getcontext().prec = 28
+from dataclasses import dataclass, field, replace
 
 # Constants
-WAD = Decimal('1000000000000000000')  # 18 decimals
+# All amounts are integers scaled by WAD, mirroring prb-math's UD60x18 so that
+# every multiplication and division truncates exactly like the contracts do.
+WAD = 10 ** 18  # 18 decimals
 UNIT = WAD
 
-@dataclass
+# Powers of ten for decimal <-> WAD conversions, indexed by exponent
+POW10 = tuple(10 ** k for k in range(40))
+
+# Maximum number of quotes memoized per pool between state updates
+QUOTE_CACHE_SIZE = 4096
+
+# Quoting kernels from Core.sol
+# Kept as module-level functions on plain ints so the quote path avoids
+# method dispatch; the matching MobiusPool methods delegate here.
+
+def _solvency_case2_denom(r_thres_wad: int) -> int:
+    """
+    Denominator of case 2 of the solvency curve integral, in WAD.
+    5e18 * (UNIT - rThres)^4 in WAD is 5 * (UNIT - rThres)^4; it only
+    depends on rThres, so pools compute it once in PoolConfig.
+    """
+    # (UNIT - rThres).powu(4) unrolled: prb-math squares twice, truncating each time
+    t = UNIT - r_thres_wad
+    t2 = t * t // UNIT
+    t4 = t2 * t2 // UNIT
+    return 5 * t4
+
+def _case2_integral(r_wad: int, case2_denom: int) -> int:
+    """
+    Case 2 of the solvency curve integral (rThres < r < UNIT), in WAD.
+    Callers are responsible for checking that r is in this regime.
+    """
+    # (UNIT - r).powu(5) unrolled: prb-math squares twice, then multiplies
+    # by the base once, truncating after every step
+    u = UNIT - r_wad
+    u2 = u * u // UNIT
+    u4 = u2 * u2 // UNIT
+    u5 = u * u4 // UNIT
+    return u5 * UNIT // case2_denom
+
+def _solvency_curve_integral_wad(r_thres_wad: int, r_wad: int, case2_denom: int) -> int:
+    """
+    Compute the definite integral F(r) = ∫ -p(s) ds from r to 1, in WAD.
+    Whitepaper Formula 4.2
+    case2_denom is _solvency_case2_denom(r_thres_wad).
+    """
+    if r_thres_wad == 0:
+        raise ValueError("R threshold cannot be zero")
+    if r_wad == 0:
+        raise ValueError("R cannot be zero")
+    
+    # Case 1: r <= rThres
+    if r_wad <= r_thres_wad:
+        # (UNIT - rThres) / 5e18 in WAD is an exact integer division by 5
+        return (UNIT - r_thres_wad) // 5 + r_thres_wad - r_wad
+    elif r_wad < UNIT:
+        # Case 2: rThres < r < UNIT
+        return _case2_integral(r_wad, case2_denom)
+    else:
+        # Case 3: r >= UNIT
+        return 0
+
+def _solvency_score_wad(r_thres_wad: int, case2_denom: int, cov_before: int, cash_wad: int,
+                        liability_wad: int, cash_change_wad: int, add_cash: bool) -> int:
+    """
+    Compute solvency score during a change in cash position, in WAD.
+    Whitepaper Def. 4.1
+    case2_denom is _solvency_case2_denom(r_thres_wad) and cov_before is
+    cash_wad * UNIT // liability_wad, both precomputed by the caller.
+    """
+    if liability_wad == 0:
+        raise ValueError("Liability cannot be zero")
+    
+    if add_cash:
+        cov_after = (cash_wad + cash_change_wad) * UNIT // liability_wad
+    else:
+        cov_after = (cash_wad - cash_change_wad) * UNIT // liability_wad
+    
+    # If coverage stays unchanged, solvency score is 0
+    if cov_before == cov_after:
+        return 0
+    
+    # The integral is decreasing in r, so the score is
+    # (F(lower) - F(upper)) / (upper - lower) whichever way the cash moves
+    if cov_before > cov_after:
+        cov_lower, cov_upper = cov_after, cov_before
+    else:
+        cov_lower, cov_upper = cov_before, cov_after
+    
+    if 0 < r_thres_wad < cov_lower and cov_upper < UNIT:
+        # Both coverage ratios are in case 2 (rThres < r < UNIT), the usual
+        # regime: skip the zero checks and regime branches of the generic path
+        integral_lower = _case2_integral(cov_lower, case2_denom)
+        integral_upper = _case2_integral(cov_upper, case2_denom)
+    else:
+        integral_lower = _solvency_curve_integral_wad(r_thres_wad, cov_lower, case2_denom)
+        integral_upper = _solvency_curve_integral_wad(r_thres_wad, cov_upper, case2_denom)
+    
+    return (integral_lower - integral_upper) * UNIT // (cov_upper - cov_lower)
+
+@dataclass(slots=True, frozen=True)
 class AssetState:
-    """Represents the state of an asset in the pool"""
+    """
+    Read-only snapshot of the state of an asset in the pool.
+    Change asset state through MobiusPool.update_asset_state/update_asset_price.
+    """
     token_address: str
-    cash: Decimal  # in WAD
-    liability: Decimal  # in WAD
+    cash: int  # in WAD
+    liability: int  # in WAD
     underlying_token_decimals: int
     aggregate_account: str
-    price_wad: Optional[Decimal] = None  # Price in WAD (None for stable assets, actual price for variant assets)
+    price_wad: Optional[int] = None  # Price in WAD (None for stable assets, actual price for variant assets)
     
     @property
-    def coverage_ratio(self) -> Decimal:
-        """Calculate coverage ratio = cash / liability"""
+    def coverage_ratio(self) -> int:
+        """Calculate coverage ratio = cash / liability, in WAD"""
         if self.liability == 0:
             raise ValueError("Liability cannot be zero")
-        return self.cash / self.liability
+        return self.cash * UNIT // self.liability
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PoolConfig:
-    """Pool configuration parameters"""
-    r_threshold: Decimal  # in WAD
-    haircut_rate: Decimal  # in WAD
-    retention_ratio: Decimal  # in WAD
+    """
+    Pool configuration parameters.
+    Immutable so derived values cannot go stale; change a pool's configuration
+    through MobiusPool.update_config.
+    """
+    r_threshold: int  # in WAD
+    haircut_rate: int  # in WAD
+    retention_ratio: int  # in WAD
     pool_type: str  # "stable" or "variant"
+    # Case 2 denominator of the solvency curve integral, derived from r_threshold
+    _case2_denom: int = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # The dataclass is frozen, so the derived field is set through object.__setattr__
+        object.__setattr__(self, "_case2_denom", _solvency_case2_denom(self.r_threshold))
 
 class MobiusPool:
     """
@@ -43,9 +148,74 @@ class MobiusPool:
     
     def __init__(self, pool_address: str, pool_config: PoolConfig):
         self.pool_address = pool_address
-        self.config = pool_config
-        self.assets: Dict[str, AssetState] = {}
+        self._config = pool_config
+        # Stable pools swap 1:1 before solvency; variant pools convert by price.
+        # Decided once here rather than comparing pool_type on every quote.
+        self._is_variant = pool_config.pool_type != "stable"
         self.asset_addresses: Dict[str, str] = {}  # token_address -> asset_address
+        # Asset state is stored column-wise: each token is interned to an index
+        # once, and quotes read cash, liability, etc. from the lists below.
+        self._idx: Dict[str, int] = {}  # token_address -> index into the columns
+        self._tokens: List[str] = []
+        self._cash: List[int] = []  # in WAD
+        self._liab: List[int] = []  # in WAD
+        self._cov: List[int] = []  # coverage ratio cash / liability in WAD, 0 if liability is zero
+        self._price: List[Optional[int]] = []  # in WAD, None for stable assets
+        self._decimals: List[int] = []
+        # Scale factors between token decimals and WAD, see _to_wad_at/_from_wad_at
+        self._wad_mul: List[int] = []  # 10^(18 - d) if d < 18, else 1
+        self._wad_div: List[int] = []  # 10^(d - 18) if d > 18, else 1
+        self._agg_account: List[str] = []
+        # Aggregate accounts are interned to integer group ids so swaps compare ints
+        self._agg_id: Dict[str, int] = {}  # aggregate_account -> group id
+        self._agg_gid: List[int] = []
+        # Quotes are memoized per state version; any state or config update bumps the version,
+        # so entries from older versions are never hit again and are evicted first.
+        self._state_version = 0
+        self._quote_cache: Dict[Tuple[str, str, int, int], Tuple[bool, int, int, str]] = {}
+    
+    @property
+    def config(self) -> PoolConfig:
+        """Pool configuration; change it through update_config"""
+        return self._config
+    
+    @property
+    def assets(self) -> Dict[str, AssetState]:
+        """
+        Read-only snapshot of the state of every asset, keyed by token address.
+        Builds a new snapshot of all assets on each access; use get_asset_state
+        to look up a single asset.
+        """
+        return {token: self._asset_view(i) for token, i in self._idx.items()}
+    
+    def _asset_view(self, i: int) -> AssetState:
+        """Build an AssetState snapshot of the asset at index i"""
+        return AssetState(
+            token_address=self._tokens[i],
+            cash=self._cash[i],
+            liability=self._liab[i],
+            underlying_token_decimals=self._decimals[i],
+            aggregate_account=self._agg_account[i],
+            price_wad=self._price[i]
+        )
+    
+    def _intern_token(self, token_address: str) -> int:
+        """Return the column index of a token, appending a new row if it is unknown"""
+        i = self._idx.get(token_address)
+        if i is None:
+            i = len(self._tokens)
+            self._idx[token_address] = i
+            self._tokens.append(token_address)
+            self._cash.append(0)
+            self._liab.append(0)
+            self._cov.append(0)
+            self._price.append(None)
+            self._decimals.append(18)
+            self._wad_mul.append(1)
+            self._wad_div.append(1)
+            self._agg_account.append("")
+            self._agg_gid.append(-1)
+        return i
         
     def update_asset_state(self, token_address: str, asset_address: str, 
                           cash: int, liability: int,
@@ -65,34 +235,106 @@ class MobiusPool:
             price_wad: Price in WAD (None for stable assets, actual price for variant assets)
             values_in_wad: If True, cash and liability are already in WAD format
         """
+        # Validate and convert before touching any column, so a bad input leaves the pool unchanged
+        prepared = self._prepare_asset(cash, liability, underlying_token_decimals, values_in_wad)
+        try:
+            self._write_asset(token_address, asset_address, underlying_token_decimals,
+                              aggregate_account, price_wad, prepared)
+        finally:
+            self._state_version += 1
+    
+    def update_assets_batch(self, token_addresses: List[str], asset_addresses: List[str],
+                            cashes: List[int], liabilities: List[int],
+                            underlying_token_decimals: List[int], aggregate_accounts: List[str],
+                            values_in_wad: bool, prices_wad: Optional[List[Optional[int]]] = None):
+        """
+        Update the state of several assets in the pool at once.
+        Equivalent to calling update_asset_state for each asset, but the state
+        version (and with it the quote cache) is only invalidated once.
+        
+        Args:
+            token_addresses: ERC20 token address of each asset
+            asset_addresses: Asset contract address of each asset
+            cashes: Cash balance of each asset (in WAD if values_in_wad=True, otherwise in token decimals)
+            liabilities: Liability of each asset (in WAD if values_in_wad=True, otherwise in token decimals)
+            underlying_token_decimals: Underlying token decimals of each asset
+            aggregate_accounts: Aggregate account address of each asset
+            values_in_wad: If True, cashes and liabilities are already in WAD format
+            prices_wad: Price in WAD of each asset (None for stable assets); omit for a stable pool
+        """
+        n = len(token_addresses)
+        if prices_wad is None:
+            prices_wad = [None] * n
+        if not (len(asset_addresses) == len(cashes) == len(liabilities) == len(underlying_token_decimals)
+                == len(aggregate_accounts) == len(prices_wad) == n):
+            raise ValueError("Batch inputs must have the same length")
+        
+        # Validate and convert every row before writing any, so a bad row leaves the pool unchanged
+        prepare_asset = self._prepare_asset
+        prepared_rows = [prepare_asset(cash, liability, decimals, values_in_wad)
+                         for cash, liability, decimals in zip(cashes, liabilities, underlying_token_decimals)]
+        
+        write_asset = self._write_asset
+        try:
+            for row in zip(token_addresses, asset_addresses, underlying_token_decimals,
+                           aggregate_accounts, prices_wad, prepared_rows):
+                write_asset(*row)
+        finally:
+            self._state_version += 1
+    
+    def _prepare_asset(self, cash: int, liability: int, underlying_token_decimals: int,
+                       values_in_wad: bool) -> Tuple[int, int, int, int, int]:
+        """
+        Validate one asset's data and convert it for the state columns.
+        Returns (wad_mul, wad_div, cash_wad, liability_wad, cov_wad).
+        """
+        d = underlying_token_decimals
+        if not 0 <= d < 18 + len(POW10):
+            raise ValueError("Unsupported underlying token decimals")
+        wad_mul = POW10[18 - d] if d < 18 else 1
+        wad_div = POW10[d - 18] if d > 18 else 1
+        
         # Convert to WAD for internal calculations if needed
         if values_in_wad:
-            cash_wad = Decimal(str(cash))
-            liability_wad = Decimal(str(liability))
+            cash_wad = cash
+            liability_wad = liability
         else:
-            cash_wad = self._to_wad(cash, underlying_token_decimals)
-            liability_wad = self._to_wad(liability, underlying_token_decimals)
-        
-        price_decimal = Decimal(str(price_wad)) if price_wad is not None else None
-        
-        self.assets[token_address] = AssetState(
-            token_address=token_address,
-            cash=cash_wad,
-            liability=liability_wad,
-            underlying_token_decimals=underlying_token_decimals,
-            aggregate_account=aggregate_account,
-            price_wad=price_decimal
-        )
+            # At most one of wad_mul and wad_div differs from 1, as in _to_wad_at
+            cash_wad = cash * wad_mul // wad_div
+            liability_wad = liability * wad_mul // wad_div
+        
+        cov_wad = cash_wad * UNIT // liability_wad if liability_wad != 0 else 0
+        return wad_mul, wad_div, cash_wad, liability_wad, cov_wad
+    
+    def _write_asset(self, token_address: str, asset_address: str, underlying_token_decimals: int,
+                     aggregate_account: str, price_wad: Optional[int],
+                     prepared: Tuple[int, int, int, int, int]):
+        """Write one asset prepared by _prepare_asset into the state columns, without bumping the state version"""
+        wad_mul, wad_div, cash_wad, liability_wad, cov_wad = prepared
+        i = self._intern_token(token_address)
+        self._decimals[i] = underlying_token_decimals
+        self._wad_mul[i] = wad_mul
+        self._wad_div[i] = wad_div
+        self._cash[i] = cash_wad
+        self._liab[i] = liability_wad
+        self._cov[i] = cov_wad
+        self._price[i] = price_wad
+        self._agg_account[i] = aggregate_account
+        self._agg_gid[i] = self._agg_id.setdefault(aggregate_account, len(self._agg_id))
         self.asset_addresses[token_address] = asset_address
     
     def get_asset_state(self, token_address: str) -> Optional[AssetState]:
-        """Get current state of an asset"""
-        return self.assets.get(token_address)
+        """
+        Get current state of an asset.
+        Returns a read-only snapshot; use update_asset_state/update_asset_price to change it.
+        """
+        i = self._idx.get(token_address)
+        return self._asset_view(i) if i is not None else None
     
     def is_stable_asset(self, token_address: str) -> bool:
         """Check if an asset is a stable asset (no price oracle needed)"""
-        asset = self.assets.get(token_address)
-        return asset is not None and asset.price_wad is None
+        i = self._idx.get(token_address)
+        return i is not None and self._price[i] is None
     
     def update_asset_price(self, token_address: str, price_wad: int):
         """
@@ -103,11 +345,24 @@ class MobiusPool:
             token_address: ERC20 token address
             price_wad: Price in WAD (e.g., 1072690000000000000 for 1.07269)
         """
-        if token_address not in self.assets:
+        i = self._idx.get(token_address)
+        if i is None:
             raise ValueError("Asset not found in pool")
         
-        asset = self.assets[token_address]
-        asset.price_wad = Decimal(str(price_wad))
+        self._price[i] = price_wad
+        self._state_version += 1
+    
+    def update_config(self, **changes):
+        """
+        Update pool configuration parameters.
+        Called by DEX aggregators to sync settable on-chain parameters.
+        
+        Args:
+            **changes: PoolConfig fields to change, e.g. haircut_rate=50000000000000
+        """
+        self._config = replace(self._config, **changes)
+        self._is_variant = self._config.pool_type != "stable"
+        self._state_version += 1
     
     def quote_swap(self, from_token: str, to_token: str, from_amount: int) -> Tuple[int, int]:
         """
@@ -122,182 +377,228 @@ class MobiusPool:
         Returns:
             Tuple of (to_amount, haircut) in to_token decimals
         """
-        from_asset = self.assets.get(from_token)
-        to_asset = self.assets.get(to_token)
-        
-        if not from_asset or not to_asset:
-            raise ValueError("Asset not found in pool")
+        ok, to_amount, haircut, reason = self._quote_core(from_token, to_token, from_amount)
+        if not ok:
+            raise ValueError(reason)
+        return to_amount, haircut
+
+    def quote_swap_batch(self, from_tokens: List[str], to_tokens: List[str],
+                         from_amounts: List[int]) -> Tuple[List[Optional[int]], List[Optional[int]]]:
+        """
+        Quote a batch of swaps against the current pool state.
+        Every route goes through the same memoized quote path as quote_swap,
+        but a route that quote_swap would reject does not fail the batch:
+        its to_amount and haircut entries are None instead.
+
+        Args:
+            from_tokens: Source token address of each route
+            to_tokens: Destination token address of each route
+            from_amounts: Amount to swap of each route, in from_token decimals
+
+        Returns:
+            Tuple of (to_amounts, haircuts) lists, each entry in its to_token
+            decimals, or None where the route cannot be quoted
+        """
+        if not len(from_tokens) == len(to_tokens) == len(from_amounts):
+            raise ValueError("Batch inputs must have the same length")
+
+        quote_core = self._quote_core
+
+        to_amounts: List[Optional[int]] = []
+        haircuts: List[Optional[int]] = []
+        for from_token, to_token, from_amount in zip(from_tokens, to_tokens, from_amounts):
+            ok, to_amount, haircut, _ = quote_core(from_token, to_token, from_amount)
+            to_amounts.append(to_amount if ok else None)
+            haircuts.append(haircut if ok else None)
+
+        return to_amounts, haircuts
+
+    def _quote_core(self, from_token: str, to_token: str, from_amount: int) -> Tuple[bool, int, int, str]:
+        """
+        Single quote path shared by quote_swap, quote_swap_batch and validate_swap.
+        Results are memoized until the next state update, so a validate_swap
+        followed by quote_swap of the same route computes the quote once.
         
-        if from_asset.aggregate_account != to_asset.aggregate_account:
-            raise ValueError("Assets must be in the same aggregate account")
+        Returns:
+            Tuple of (ok, to_amount, haircut, reason). When ok, amounts are in
+            to_token decimals; otherwise reason says why the swap cannot be quoted.
+        """
+        key = (from_token, to_token, from_amount, self._state_version)
+        cache = self._quote_cache
+        result = cache.get(key)
+        if result is None:
+            result = self._compute_quote(from_token, to_token, from_amount)
+            if len(cache) >= QUOTE_CACHE_SIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del cache[next(iter(cache))]
+            cache[key] = result
+        return result
+
+    def _compute_quote(self, from_token: str, to_token: str, from_amount: int) -> Tuple[bool, int, int, str]:
+        """
+        Uncached body of _quote_core.
+        Resolves both assets, converts to WAD, quotes and converts back once.
+        """
+        i = self._idx.get(from_token)
+        j = self._idx.get(to_token)
         
-        # Convert from_amount to WAD
-        from_amount_wad = self._to_wad(from_amount, from_asset.underlying_token_decimals)
+        if i is None or j is None:
+            return False, 0, 0, "Asset not found in pool"
         
-        # Calculate quote in WAD
-        to_amount_wad, haircut_wad = self._quote_swap_internal(from_asset, to_asset, from_amount_wad)
+        if self._agg_gid[i] != self._agg_gid[j]:
+            return False, 0, 0, "Assets must be in the same aggregate account"
         
-        # Convert back to token decimals
-        to_amount = self._from_wad(to_amount_wad, to_asset.underlying_token_decimals)
-        haircut = self._from_wad(haircut_wad, to_asset.underlying_token_decimals)
+        try:
+            to_amount_wad, haircut_wad = self._quote_swap_internal(i, j, self._to_wad_at(from_amount, i))
+        except ValueError as e:
+            return False, 0, 0, str(e)
         
-        return int(to_amount), int(haircut)
-    
-    def _quote_swap_internal(self, from_asset: AssetState, to_asset: AssetState, 
-                           from_amount_wad: Decimal) -> Tuple[Decimal, Decimal]:
+        return True, self._from_wad_at(to_amount_wad, j), self._from_wad_at(haircut_wad, j), ""
+
+    def _quote_swap_internal(self, i: int, j: int, from_amount_wad: int) -> Tuple[int, int]:
         """
-        Internal quote calculation in WAD.
+        Internal quote calculation in WAD, from the asset at index i to the asset at index j.
         Mirrors the _quoteSwap function from StablePool.sol and VariantPool.sol
         """
-        if self.config.pool_type == "stable":
+        if self._is_variant:
+            ideal_to_amount = self._quote_ideal_to_amount(i, j, from_amount_wad)
+        else:  # stable pool
             ideal_to_amount = from_amount_wad
-        else:  # variant pool
-            ideal_to_amount = self._quote_ideal_to_amount(from_asset, to_asset, from_amount_wad)
         
-        if to_asset.cash < ideal_to_amount:
+        to_cash = self._cash[j]
+        if to_cash < ideal_to_amount:
             raise ValueError("Insufficient cash in destination asset")
         
         # Calculate solvency scores
-        solvency_from = self._solvency_score(
-            self.config.r_threshold,
-            from_asset.cash,
-            from_asset.liability,
+        solvency_from = _solvency_score_wad(
+            self._config.r_threshold,
+            self._config._case2_denom,
+            self._cov[i],
+            self._cash[i],
+            self._liab[i],
             from_amount_wad,
             True  # add_cash
         )
         
-        solvency_to = self._solvency_score(
-            self.config.r_threshold,
-            to_asset.cash,
-            to_asset.liability,
+        solvency_to = _solvency_score_wad(
+            self._config.r_threshold,
+            self._config._case2_denom,
+            self._cov[j],
+            to_cash,
+            self._liab[j],
             ideal_to_amount,
             False  # add_cash
         )
         
-        # Calculate to_amount using solvency scores (convert to WAD format)
-        to_amount = self._compute_to_amount(solvency_from * UNIT, solvency_to * UNIT, ideal_to_amount)
+        # Calculate to_amount using solvency scores, as _compute_to_amount does;
+        # the scores are already in WAD so only the one division by UNIT remains
+        to_amount = ideal_to_amount * (UNIT + solvency_from - solvency_to) // UNIT
         
-        # Apply haircut
-        haircut = self._haircut(to_amount, self.config.haircut_rate)
+        # Apply haircut, as _haircut does
+        haircut = to_amount * self._config.haircut_rate // UNIT
         actual_to_amount = to_amount - haircut
         
         return actual_to_amount, haircut
     
-    def _quote_ideal_to_amount(self, from_asset: AssetState, to_asset: AssetState, 
-                              from_amount_wad: Decimal) -> Decimal:
+    def _quote_ideal_to_amount(self, i: int, j: int, from_amount_wad: int) -> int:
         """
         Quote ideal amount for variant pools using price oracles.
-        Uses the stored prices in the asset states.
+        Uses the stored prices of the assets at indices i and j.
         """
-        from_price = from_asset.price_wad
-        to_price = to_asset.price_wad
+        from_price = self._price[i]
+        to_price = self._price[j]
         
         if to_price is None or from_price is None:
             raise ValueError("Invalid price - price not set for variant asset")
+        if to_price == 0 or from_price == 0:
+            raise ValueError("Price cannot be zero")
         
-        return self._convert_token_amount(from_amount_wad, from_price, to_price)
+        # _convert_token_amount inlined: fromAmount * fromPrice truncates to WAD
+        # before dividing, so a cached fromPrice / toPrice ratio would not match Solidity
+        return (from_amount_wad * from_price // UNIT) * UNIT // to_price
     
     # Mathematical functions from Core.sol
     
-    def _to_wad(self, x: int, d: int) -> Decimal:
+    def _to_wad(self, x: int, d: int) -> int:
         """Convert x from d decimals to WAD (18 decimals)"""
-        x_decimal = Decimal(str(x))
         if d < 18:
-            return x_decimal * (10 ** (18 - d))
+            return x * POW10[18 - d]
         elif d > 18:
-            return x_decimal / (10 ** (d - 18))
-        return x_decimal
+            return x // POW10[d - 18]
+        return x
     
-    def _from_wad(self, x: Decimal, d: int) -> Decimal:
+    def _from_wad(self, x: int, d: int) -> int:
         """Convert x from WAD (18 decimals) to d decimals"""
         if d < 18:
-            return x / (10 ** (18 - d))
+            return x // POW10[18 - d]
         elif d > 18:
-            return x * (10 ** (d - 18))
+            return x * POW10[d - 18]
         return x
     
-    def _coverage_ratio(self, cash_wad: Decimal, liability_wad: Decimal) -> Decimal:
-        """Calculate coverage ratio = cash / liability"""
+    def _to_wad_at(self, x: int, i: int) -> int:
+        """Convert x from the decimals of the asset at index i to WAD, using its precomputed scale"""
+        mul = self._wad_mul[i]
+        if mul != 1:
+            return x * mul
+        div = self._wad_div[i]
+        return x // div if div != 1 else x
+    
+    def _from_wad_at(self, x: int, i: int) -> int:
+        """Convert x from WAD to the decimals of the asset at index i, using its precomputed scale"""
+        mul = self._wad_mul[i]
+        if mul != 1:
+            return x // mul
+        div = self._wad_div[i]
+        return x * div if div != 1 else x
+    
+    def _coverage_ratio(self, cash_wad: int, liability_wad: int) -> int:
+        """Calculate coverage ratio = cash / liability, in WAD"""
         if liability_wad == 0:
             raise ValueError("Liability cannot be zero")
-        return cash_wad / liability_wad
+        return cash_wad * UNIT // liability_wad
     
-    def _solvency_curve_integral(self, r_thres_wad: Decimal, r_wad: Decimal) -> Decimal:
+    def _solvency_curve_integral(self, r_thres_wad: int, r_wad: int) -> int:
         """
         Compute the definite integral F(r) = ∫ -p(s) ds from r to 1
         Whitepaper Formula 4.2
         """
-        if r_thres_wad == 0:
-            raise ValueError("R threshold cannot be zero")
-        if r_wad == 0:
-            raise ValueError("R cannot be zero")
-        
-        # Case 1: r <= rThres
-        if r_wad <= r_thres_wad:
-            return (UNIT - r_thres_wad) / Decimal('5000000000000000000') + r_thres_wad - r_wad
-        elif r_wad < UNIT:
-            # Case 2: rThres < r < UNIT
-            return ((UNIT - r_wad) ** 5) / (Decimal('5000000000000000000') * (UNIT - r_thres_wad) ** 4)
-        else:
-            # Case 3: r >= UNIT
-            return Decimal('0')
+        return _solvency_curve_integral_wad(r_thres_wad, r_wad, _solvency_case2_denom(r_thres_wad))
     
-    def _solvency_score(self, r_thres_wad: Decimal, cash_wad: Decimal, liability_wad: Decimal,
-                       cash_change_wad: Decimal, add_cash: bool) -> Decimal:
+    def _solvency_score(self, r_thres_wad: int, cash_wad: int, liability_wad: int,
+                       cash_change_wad: int, add_cash: bool) -> int:
         """
-        Compute solvency score during a change in cash position.
+        Compute solvency score during a change in cash position, in WAD.
         Whitepaper Def. 4.1
         """
-        if liability_wad == 0:
-            raise ValueError("Liability cannot be zero")
-        
-        cov_before = cash_wad / liability_wad
-        
-        if add_cash:
-            cov_after = (cash_wad + cash_change_wad) / liability_wad
-        else:
-            cov_after = (cash_wad - cash_change_wad) / liability_wad
-        
-        # If coverage stays unchanged, solvency score is 0
-        if cov_before == cov_after:
-            return Decimal('0')
-        
-        # Convert coverage ratios to WAD for the integral calculation (like Solidity's .unwrap())
-        cov_before_wad = cov_before * UNIT
-        cov_after_wad = cov_after * UNIT
-        
-        solvency_integral_before = self._solvency_curve_integral(r_thres_wad, cov_before_wad)
-        solvency_integral_after = self._solvency_curve_integral(r_thres_wad, cov_after_wad)
-        
-        if cov_before > cov_after:
-            return (solvency_integral_after - solvency_integral_before) / (cov_before - cov_after)
-        else:
-            return (solvency_integral_before - solvency_integral_after) / (cov_after - cov_before)
+        cov_before = self._coverage_ratio(cash_wad, liability_wad)
+        return _solvency_score_wad(r_thres_wad, _solvency_case2_denom(r_thres_wad), cov_before,
+                                   cash_wad, liability_wad, cash_change_wad, add_cash)
     
-    def _compute_to_amount(self, si_wad: Decimal, sj_wad: Decimal, from_amount_wad: Decimal) -> Decimal:
+    def _compute_to_amount(self, si_wad: int, sj_wad: int, from_amount_wad: int) -> int:
         """
         Compute toAmount using solvency scores.
         Whitepaper Def. 4.1: toAmount = fromAmount * (1 + Si - Sj)
         """
         # The solvency scores are in WAD, and we use them directly like in Solidity
         # Formula: toAmount = fromAmount * (UNIT + si - sj)
-        return from_amount_wad * (UNIT + si_wad - sj_wad) / UNIT
+        return from_amount_wad * (UNIT + si_wad - sj_wad) // UNIT
     
-    def _haircut(self, amount_wad: Decimal, rate_wad: Decimal) -> Decimal:
+    def _haircut(self, amount_wad: int, rate_wad: int) -> int:
         """Apply haircut rate to amount"""
         # The rate is in WAD, and we use it directly like in Solidity
         # Formula: haircut = amount * rate
-        return amount_wad * rate_wad / UNIT
+        return amount_wad * rate_wad // UNIT
     
-    def _convert_token_amount(self, from_amount_wad: Decimal, from_price_wad: Decimal, 
-                            to_price_wad: Decimal) -> Decimal:
+    def _convert_token_amount(self, from_amount_wad: int, from_price_wad: int, 
+                            to_price_wad: int) -> int:
         """
         Convert amount from one token to another using relative prices.
         Formula: toAmount = fromAmount * (fromPrice / toPrice)
         """
         if to_price_wad == 0 or from_price_wad == 0:
             raise ValueError("Price cannot be zero")
-        return from_amount_wad * from_price_wad / to_price_wad
+        # fromAmount * fromPrice truncates to WAD before dividing, as in Solidity
+        return (from_amount_wad * from_price_wad // UNIT) * UNIT // to_price_wad
     
     def get_swap_function_signature(self) -> str:
         """Return the function signature for the swap function"""
@@ -324,34 +625,14 @@ class MobiusPool:
         Returns True if swap is valid, False otherwise.
         """
         try:
-            from_asset = self.assets.get(from_token)
-            to_asset = self.assets.get(to_token)
-            
-            if not from_asset or not to_asset:
-                return False
-            
-            if from_asset.aggregate_account != to_asset.aggregate_account:
-                return False
-            
             if from_amount <= 0:
                 return False
             
-            # Check if destination asset has sufficient cash
-            from_amount_wad = self._to_wad(from_amount, from_asset.underlying_token_decimals)
-            if self.config.pool_type == "stable":
-                ideal_to_amount = from_amount_wad
-            else:
-                ideal_to_amount = self._quote_ideal_to_amount(from_asset, to_asset, from_amount_wad)
-            
-            if to_asset.cash < ideal_to_amount:
-                return False
-            
-            return True
-            
+            ok, _, _, _ = self._quote_core(from_token, to_token, from_amount)
+            return ok
         except Exception:
             return False
 
-
 # Example usage and helper functions
 
 # Token configuration
@@ -414,7 +695,7 @@ def display_pool_state(pool: MobiusPool):
         # The values are stored in WAD (18 decimals), so divide by 10^18
         cash_readable = asset.cash / (10 ** 18)
         liability_readable = asset.liability / (10 ** 18)
-        coverage_ratio = asset.coverage_ratio
+        coverage_ratio = asset.coverage_ratio / (10 ** 18)
         
         print(f"{token_name}:")
         print(f"  Cash: {cash_readable:,.2f}")
@@ -428,9 +709,9 @@ def display_pool_state(pool: MobiusPool):
 def create_mantle_mainnet_stable_pool() -> MobiusPool:
     """Create Mantle mainnet stable pool instance"""
     config = PoolConfig(
-        r_threshold=Decimal('230000000000000000'),  # 0.23 in WAD
-        haircut_rate=Decimal('50000000000000'),  # 0.005% haircut
-        retention_ratio=Decimal('200000000000000000'),  # 20% retention
+        r_threshold=230000000000000000,  # 0.23 in WAD
+        haircut_rate=50000000000000,  # 0.005% haircut
+        retention_ratio=200000000000000000,  # 20% retention
         pool_type="stable"
     )
     return MobiusPool(MANTLE_MAINNET_ADDRESSES["stable_pool"], config)
@@ -438,9 +719,9 @@ def create_mantle_mainnet_stable_pool() -> MobiusPool:
 def create_mantle_mainnet_variant_pool() -> MobiusPool:
     """Create Mantle mainnet variant pool instance"""
     config = PoolConfig(
-        r_threshold=Decimal('200000000000000000'),  # 0.20 in WAD
-        haircut_rate=Decimal('50000000000000'),  # 0.005% haircut
-        retention_ratio=Decimal('200000000000000000'),  # 20% retention
+        r_threshold=200000000000000000,  # 0.20 in WAD
+        haircut_rate=50000000000000,  # 0.005% haircut
+        retention_ratio=200000000000000000,  # 20% retention
         pool_type="variant"
     )
     return MobiusPool(MANTLE_MAINNET_ADDRESSES["variant_pool"], config)
@@ -449,83 +730,54 @@ def setup_stable_pool_state(pool: MobiusPool, addresses: dict):
     """
     Setup stable pool with USDe, USDC, USDT assets using real on-chain data
     """
-    # USDe (18 decimals) - Real on-chain data
-    pool.update_asset_state(
-        token_address=addresses["tokens"]["USDe"],
-        asset_address=addresses["assets"]["USDe"],
-        cash=21564039972018040980967,  # Real USDe cash
-        liability=24336765812301186559140,  # Real USDe liability
-        underlying_token_decimals=18,
-        aggregate_account=addresses["aggregate_accounts"]["stable"],
+    tokens = ["USDe", "USDC", "USDT"]
+    pool.update_assets_batch(
+        token_addresses=[addresses["tokens"][token] for token in tokens],
+        asset_addresses=[addresses["assets"][token] for token in tokens],
+        cashes=[
+            21564039972018040980967,  # Real USDe cash
+            21491644533317066991913,  # Real USDC cash (in micro units)
+            17494532897516387104081,  # Real USDT cash (in micro units)
+        ],
+        liabilities=[
+            24336765812301186559140,  # Real USDe liability
+            18717507771725148273016,  # Real USDC liability (in micro units)
+            17494496221405803482740,  # Real USDT liability (in micro units)
+        ],
+        underlying_token_decimals=[18, 6, 6],
+        aggregate_accounts=[addresses["aggregate_accounts"]["stable"]] * len(tokens),
         values_in_wad=True,  # Values are in WAD format
-        price_wad=None  # Stable asset, no price needed
-    )
-    
-    # USDC (6 decimals) - Real on-chain data (in micro units)
-    pool.update_asset_state(
-        token_address=addresses["tokens"]["USDC"],
-        asset_address=addresses["assets"]["USDC"],
-        cash=21491644533317066991913,  # Real USDC cash (in micro units)
-        liability=18717507771725148273016,  # Real USDC liability (in micro units)
-        underlying_token_decimals=6,
-        aggregate_account=addresses["aggregate_accounts"]["stable"],
-        values_in_wad=True,  # Values are in WAD format
-        price_wad=None  # Stable asset, no price needed
-    )
-    
-    # USDT (6 decimals) - Real on-chain data (in micro units)
-    pool.update_asset_state(
-        token_address=addresses["tokens"]["USDT"],
-        asset_address=addresses["assets"]["USDT"],
-        cash=17494532897516387104081,  # Real USDT cash (in micro units)
-        liability=17494496221405803482740,  # Real USDT liability (in micro units)
-        underlying_token_decimals=6,
-        aggregate_account=addresses["aggregate_accounts"]["stable"],
-        values_in_wad=True,  # Values are in WAD format
-        price_wad=None  # Stable asset, no price needed
+        prices_wad=None  # Stable assets, no price needed
     )
 
 def setup_variant_pool_state(pool: MobiusPool, addresses: dict):
     """
     Setup variant pool with cmETH, mETH, WETH assets
     """
-    # WETH (18 decimals) - Base asset, price = 1
-    pool.update_asset_state(
-        token_address=addresses["tokens"]["WETH"],
-        asset_address=addresses["assets"]["WETH"],
-        cash=100000000000000000000,  # 100 WETH
-        liability=100000000000000000000,  # 100 WETH
-        underlying_token_decimals=18,
-        aggregate_account=addresses["aggregate_accounts"]["variant"],
+    tokens = ["WETH", "cmETH", "mETH"]
+    pool.update_assets_batch(
+        token_addresses=[addresses["tokens"][token] for token in tokens],
+        asset_addresses=[addresses["assets"][token] for token in tokens],
+        cashes=[
+            100000000000000000000,  # 100 WETH
+            100000000000000000000,  # 100 cmETH
+            100000000000000000000,  # 100 mETH
+        ],
+        liabilities=[
+            100000000000000000000,  # 100 WETH
+            100000000000000000000,  # 100 cmETH
+            100000000000000000000,  # 100 mETH
+        ],
+        underlying_token_decimals=[18, 18, 18],
+        aggregate_accounts=[addresses["aggregate_accounts"]["variant"]] * len(tokens),
         values_in_wad=True,  # Values are in WAD format
-        price_wad=1000000000000000000  # 1.0 in WAD (base asset)
-    )
-    
-    # cmETH (18 decimals) - Price = 1.07269
-    # price from https://market.api3.org/mantle/meth-eth-exchange-rate 
-    # cmETH has the same price as mETH
-    pool.update_asset_state(
-        token_address=addresses["tokens"]["cmETH"],
-        asset_address=addresses["assets"]["cmETH"],
-        cash=100000000000000000000,  # 100 cmETH
-        liability=100000000000000000000,  # 100 cmETH
-        underlying_token_decimals=18,
-        aggregate_account=addresses["aggregate_accounts"]["variant"],
-        values_in_wad=True,  # Values are in WAD format
-        price_wad=1072690000000000000  # 1.07269 in WAD
-    )
-    
-    # mETH (18 decimals) - Price = 1.07269 (same as cmETH)
-    # price from https://market.api3.org/mantle/meth-eth-exchange-rate
-    pool.update_asset_state(
-        token_address=addresses["tokens"]["mETH"],
-        asset_address=addresses["assets"]["mETH"],
-        cash=100000000000000000000,  # 100 mETH
-        liability=100000000000000000000,  # 100 mETH
-        underlying_token_decimals=18,
-        aggregate_account=addresses["aggregate_accounts"]["variant"],
-        values_in_wad=True,  # Values are in WAD format
-        price_wad=1072690000000000000  # 1.07269 in WAD
+        # price from https://market.api3.org/mantle/meth-eth-exchange-rate
+        # cmETH has the same price as mETH
+        prices_wad=[
+            1000000000000000000,  # WETH: 1.0 in WAD (base asset)
+            1072690000000000000,  # cmETH: 1.07269 in WAD
+            1072690000000000000,  # mETH: 1.07269 in WAD
+        ]
     )
 
 def example_stable_pool_quotes():